@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+    """
+    Index Employee Checkin on (employee, time)
+
+    Duplicate detection during sync prefetches existing checkins with
+    `employee IN (...) AND time BETWEEN ...`; without this index that query
+    scans the whole table, which keeps growing with every sync.
+    """
+    frappe.db.add_index("Employee Checkin", ["employee", "time"], index_name="zkteco_employee_time_index")
@@ -1,10 +1,144 @@
 # Copyright (c) 2025, osama.ahmed@deliverydevs.com and Contributors
 # See license.txt
 
-# import frappe
 from __future__ import annotations
+import json
+from datetime import datetime
+from unittest.mock import patch
+from urllib.parse import parse_qsl, urlsplit
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from zkteco_checkins_sync.zkteco_checkin_sync.doctype.zkteco_config import zkteco_config
+from zkteco_checkins_sync.zkteco_checkin_sync.doctype.zkteco_config.zkteco_config import (
+	dedupe_transactions,
+	detect_log_type,
+	employee_code_key,
+	get_employee_map,
+	iter_zkteco_transactions,
+	set_page_param,
+)
+
+BASE_URL = "http://10.0.0.5:8080/iclock/api/transactions/"
+
+
+class FakeResponse:
+	def __init__(self, data):
+		self.content = json.dumps(data).encode()
+		self.status_code = 200
+
+	def raise_for_status(self):
+		pass
+
+
+def fake_transactions_server(total, page_size, pagination):
+	"""
+	Return a stand-in for _SESSION.get serving `total` rows, paginated either
+	by page number or by limit/offset; the latter ignores any `page` parameter
+	"""
+	requested = []
+
+	def get(url, headers=None, params=None, timeout=None):
+		requested.append(url)
+		query = dict(parse_qsl(urlsplit(url).query))
+		query.update(params or {})
+		filters = "start_time=a&end_time=b"
+
+		if pagination == "page":
+			page = int(query.get("page", 1))
+			start = (page - 1) * page_size
+			end = min(start + page_size, total)
+			next_url = f"{BASE_URL}?{filters}&page={page + 1}" if end < total else None
+		else:
+			start = int(query.get("offset", 0))
+			end = min(start + int(query.get("limit", page_size)), total)
+			next_url = f"{BASE_URL}?{filters}&limit={page_size}&offset={end}" if end < total else None
+
+		return FakeResponse({
+			"count": total,
+			"next": next_url,
+			"results": [{"id": i, "emp_code": f"E{i}"} for i in range(start, end)],
+		})
+
+	return get, requested
+
 
 class TestZKTecoConfig(FrappeTestCase):
-	pass
+	def fetch_ids(self, pagination, total=25, page_size=10):
+		get, requested = fake_transactions_server(total, page_size, pagination)
+		cfg = frappe._dict(server_ip="10.0.0.5", server_port=8080, token="token", username="admin")
+		with patch.object(zkteco_config._SESSION, "get", side_effect=get):
+			ids = [t["id"] for t in iter_zkteco_transactions(cfg, datetime(2025, 1, 1), datetime(2025, 1, 2))]
+		return ids, requested
+
+	def test_set_page_param_keeps_other_params(self):
+		url = set_page_param(f"{BASE_URL}?start_time=2025-01-01+00%3A00%3A00&page=2&page_size=10", 5)
+		query = dict(parse_qsl(urlsplit(url).query))
+		self.assertEqual(query, {"start_time": "2025-01-01 00:00:00", "page": "5", "page_size": "10"})
+		self.assertTrue(url.startswith(BASE_URL))
+
+	def test_page_number_pagination_fetches_every_page(self):
+		ids, requested = self.fetch_ids("page")
+		self.assertEqual(sorted(ids), list(range(25)))
+		self.assertEqual(len(requested), 3)
+		self.assertEqual({dict(parse_qsl(urlsplit(url).query)).get("page") for url in requested[1:]}, {"2", "3"})
+
+	def test_limit_offset_pagination_follows_next(self):
+		ids, requested = self.fetch_ids("limit")
+		self.assertEqual(ids, list(range(25)))
+		self.assertEqual(len(requested), 3)
+		self.assertTrue(all("page=" not in url for url in requested))
+
+	def test_dedupe_transactions(self):
+		transactions = [
+			{"id": 1, "emp_code": "E1", "punch_time": "2025-01-01 09:00:00"},
+			{"id": 1, "emp_code": "E1", "punch_time": "2025-01-01 09:00:00"},
+			{"id": 2, "emp_code": "E1", "punch_time": "2025-01-01 09:00:00"},
+			{"id": 3, "emp_code": "E2", "punch_time": "2025-01-01 18:00:00"},
+		]
+		self.assertEqual([t["id"] for t in dedupe_transactions(transactions)], [1, 2, 3])
+
+	def test_detect_log_type_numeric_states(self):
+		self.assertEqual(detect_log_type({"punch_state": 0}), "IN")
+		self.assertEqual(detect_log_type({"punch_state": 1}), "OUT")
+		self.assertEqual(detect_log_type({"punch_state": "0"}), "IN")
+		self.assertEqual(detect_log_type({"punch_state": "1"}), "OUT")
+
+	def test_detect_log_type_bools_resolve_like_ints(self):
+		self.assertEqual(detect_log_type({"punch_state": False}), "IN")
+		self.assertEqual(detect_log_type({"punch_state": True}), "OUT")
+
+	def test_detect_log_type_overtime_states_use_display(self):
+		# States 4/5 are not short-circuited; the display text decides
+		self.assertEqual(detect_log_type({"punch_state": 4, "punch_state_display": "Overtime In"}), "IN")
+		self.assertEqual(detect_log_type({"punch_state": 5, "punch_state_display": "Overtime Out"}), "OUT")
+
+	def employee_map_with_rows(self, codes, rows):
+		rows = [frappe._dict(row) for row in rows]
+		with patch.object(zkteco_config, "_has_attendance_device_id", return_value=True), \
+				patch.object(zkteco_config.frappe.db, "sql", return_value=rows) as sql:
+			emp_map = get_employee_map(codes)
+		return emp_map, sql
+
+	def test_get_employee_map_field_priority(self):
+		by_device_id = {"name": "EMP-A", "employee": "X1", "user_id": None, "attendance_device_id": "E1"}
+		by_user_id = {"name": "EMP-B", "employee": "X2", "user_id": "E1", "attendance_device_id": None}
+		by_employee = {"name": "EMP-C", "employee": "E1", "user_id": None, "attendance_device_id": None}
+
+		emp_map, _sql = self.employee_map_with_rows(["E1"], [by_device_id, by_user_id, by_employee])
+		self.assertEqual(emp_map[employee_code_key("E1")], "EMP-C")
+
+		emp_map, _sql = self.employee_map_with_rows(["E1"], [by_device_id, by_user_id])
+		self.assertEqual(emp_map[employee_code_key("E1")], "EMP-B")
+
+		emp_map, _sql = self.employee_map_with_rows(["E1"], [by_device_id])
+		self.assertEqual(emp_map[employee_code_key("E1")], "EMP-A")
+
+	def test_get_employee_map_ignores_case_and_spaces(self):
+		row = {"name": "EMP-0001", "employee": "EMP-0001 ", "user_id": None, "attendance_device_id": None}
+		emp_map, sql = self.employee_map_with_rows([" emp-0001", 7], [row])
+
+		self.assertEqual(emp_map.get(employee_code_key("emp-0001")), "EMP-0001")
+		self.assertEqual(emp_map.get(employee_code_key("EMP-0001  ")), "EMP-0001")
+		self.assertEqual(set(sql.call_args[0][1]["codes"]), {"emp-0001", "7"})
@@ -6,18 +6,142 @@ import frappe
 from frappe.model.document import Document
 from frappe import _
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from frappe.utils import today, now_datetime, get_datetime, flt, cint
+from frappe.utils.password import get_encryption_key
 from datetime import datetime, timedelta
+import functools
+import hmac
 import json
+import math
 import socket
+import struct
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit
 try:
     from zk import ZK
 except Exception:
     ZK = None
+try:
+    # Faster decoding of large transaction pages when available
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+
+# Shared HTTP session so pagination and repeated syncs reuse pooled
+# keep-alive connections instead of a fresh TCP/TLS handshake per request.
+# A failed connect is retried once (nothing was sent, so this is safe for
+# POST too); read errors and timeouts are not retried. Compressed responses
+# are requested for the transaction lists.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=1, connect=1, read=0, status=0, other=0))
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+# Desk UI calls get their own session without adapter retries, so a dead
+# host is reported after a single connect timeout
+_DESK_SESSION = requests.Session()
+_DESK_SESSION.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+
+CONFIG_CACHE_KEY = "zkteco:cfg"
+
+# (connect, read) timeout for calls made from the desk UI through
+# _DESK_SESSION; an unreachable device fails after 5s instead of holding the
+# web worker for 15s
+INTERACTIVE_TIMEOUT = (5, 15)
+
+# (connect, read) timeout for sync requests; with the single connect retry a
+# dead host costs at most 2 x 5s per request, a slow page up to 30s
+SYNC_TIMEOUT = (5, 30)
+
+# LIKE pattern matching device_id of checkins created by the API sync
+ZKTECO_DEVICE_ID_PATTERN = "%ZKTeco%"
 
 
 class ZKTecoConfig(Document):
-    pass
+    def on_update(self):
+        clear_cached_config()
+
+
+def get_cached_config():
+    """
+    Return ZKTeco Config field values as a dict, cached in Redis for 60 seconds
+    """
+    cfg = frappe.cache().get_value(CONFIG_CACHE_KEY)
+    if cfg is None:
+        cfg = frappe.db.get_singles_dict("ZKTeco Config", cast=True)
+        frappe.cache().set_value(CONFIG_CACHE_KEY, cfg, expires_in_sec=60)
+    return frappe._dict(cfg)
+
+
+def clear_cached_config():
+    frappe.cache().delete_value(CONFIG_CACHE_KEY)
+
+
+def _defaults_if_missing(**kwargs):
+    """
+    Fill empty arguments from ZKTeco Config; the config is only read when
+    at least one argument is missing
+    """
+    if all(kwargs.values()):
+        return frappe._dict(kwargs)
+    cfg = get_cached_config()
+    return frappe._dict({key: value or cfg.get(key) for key, value in kwargs.items()})
+
+
+def acquire_lock(lock_key, timeout=300):
+    """
+    Atomically take a Redis lock (SET NX EX); returns False if already held
+    """
+    cache = frappe.cache()
+    return bool(cache.set(cache.make_key(lock_key), 1, nx=True, ex=timeout))
+
+
+def release_lock(lock_key):
+    frappe.cache().delete_value(lock_key)
+
+
+def get_token_cache_key(server_ip, server_port, username):
+    return f"zkteco:token:{server_ip}:{server_port}:{username}"
+
+
+def get_token_credential_hash(server_ip, server_port, username, password):
+    """
+    HMAC of the credentials that produced a cached token, so the token is
+    only handed back to a caller who supplies the same password. Keyed with
+    the site's encryption key so the cached value cannot be brute-forced
+    offline from Redis alone.
+    """
+    return hmac.new(
+        get_encryption_key().encode(),
+        f"{server_ip}:{server_port}:{username}:{password}".encode(),
+        "sha256",
+    ).hexdigest()
+
+
+def clear_cached_token(server_ip, server_port, username):
+    """
+    Drop a cached API token, e.g. after the server rejected it with 401/403
+    """
+    frappe.cache().delete_value(get_token_cache_key(server_ip, server_port, username))
+
+
+@functools.lru_cache(maxsize=32)
+def _base_url(server_ip, server_port, use_https):
+    # Auto-detect protocol based on port if not specified
+    if use_https is None:
+        # Common HTTPS ports: 443, 8443
+        # Common HTTP ports: 80, 8080, 4370
+        use_https = int(str(server_port).strip()) in (443, 8443)
+
+    protocol = "https" if use_https else "http"
+    return f"{protocol}://{server_ip}:{server_port}"
 
 
 def build_api_url(server_ip, server_port, endpoint="", use_https=None):
@@ -33,15 +157,7 @@ def build_api_url(server_ip, server_port, endpoint="", use_https=None):
     Returns:
         Full URL string
     """
-    # Auto-detect protocol based on port if not specified
-    if use_https is None:
-        # Common HTTPS ports: 443, 8443
-        # Common HTTP ports: 80, 8080, 4370
-        port_int = int(str(server_port).strip())
-        use_https = port_int in [443, 8443]
-
-    protocol = "https" if use_https else "http"
-    base_url = f"{protocol}://{server_ip}:{server_port}"
+    base_url = _base_url(server_ip, server_port, use_https)
 
     if endpoint:
         # Ensure endpoint starts with /
@@ -52,11 +168,55 @@ def build_api_url(server_ip, server_port, endpoint="", use_https=None):
     return base_url
 
 
+# Precomputed punch state lookups used by the detect_log_type fast path
+_PUNCH_STATE_LOG_TYPE = {
+    1: "OUT", "1": "OUT", "OUT": "OUT", "out": "OUT",
+    0: "IN", "0": "IN", "IN": "IN", "in": "IN",
+}
+_OUT_TOKENS = ("out", "چیک آؤٹ")
+_IN_TOKENS = ("in", "چیک ان")
+
+# Indicator lists for the slow path, built once instead of on every field
+_OUT_INDICATORS_UPPER = ('OUT', 'CHECK OUT', 'CHECKOUT', 'CHK OUT', 'CHKOUT', 'OUTGOING', 'EXIT')
+_IN_INDICATORS_UPPER = ('IN', 'CHECK IN', 'CHECKIN', 'CHK IN', 'CHKIN', 'ENTRY')
+_OUT_INDICATORS = ('out', 'check out', 'checkout', 'چیک آؤٹ')
+_IN_INDICATORS = ('in', 'check in', 'checkin', 'چیک ان')
+
+_LOG_TYPE_FIELD_CHECKS = (
+    # (field_name, is_numeric, out_value, in_value)
+    ('log_type', False, 'OUT', 'IN'),
+    ('punch_state', True, 1, 0),
+    ('punch', True, 1, 0),
+    ('punchtype', True, 1, 0),
+    ('type', False, 'OUT', 'IN'),
+    ('direction', False, 'OUT', 'IN'),
+    ('status', False, 'OUT', 'IN'),
+    ('verify_type', True, 1, 0),
+)
+
+
 def detect_log_type(transaction):
     """
     Intelligently detect if transaction is IN or OUT
     Checks multiple possible fields from ZKTeco
     """
+    # Fast path: ZKTeco punch_state is 0 (IN) or 1 (OUT) for almost every record
+    punch_state = transaction.get('punch_state')
+    state_type = type(punch_state)
+    if state_type is int or state_type is str:
+        log_type = _PUNCH_STATE_LOG_TYPE.get(punch_state)
+        if log_type:
+            return log_type
+
+    # Then the display text, e.g. "Check Out" / "چیک ان"
+    punch_state_display = transaction.get('punch_state_display')
+    if isinstance(punch_state_display, str) and punch_state_display:
+        display = punch_state_display.lower()
+        if any(x in display for x in _OUT_TOKENS):
+            return "OUT"
+        if any(x in display for x in _IN_TOKENS):
+            return "IN"
+
     # Log the raw transaction for debugging
     frappe.logger().info("===== DETECT_LOG_TYPE START =====")
     frappe.logger().info(f"Transaction data: {json.dumps(transaction, default=str, ensure_ascii=False, indent=2)}")
@@ -69,32 +229,17 @@ def detect_log_type(transaction):
         value_str = str(value).upper().strip()
         
         # Check for OUT indicators
-        out_indicators = ['OUT', 'CHECK OUT', 'CHECKOUT', 'CHK OUT', 'CHKOUT', 'OUTGOING', 'EXIT']
-        if any(x in value_str for x in out_indicators):
+        if any(x in value_str for x in _OUT_INDICATORS_UPPER):
             frappe.logger().info(f"✅ Found OUT indicator in field '{key}': {value}")
             return "OUT"
             
         # Check for IN indicators
-        in_indicators = ['IN', 'CHECK IN', 'CHECKIN', 'CHK IN', 'CHKIN', 'ENTRY']
-        if any(x in value_str for x in in_indicators):
+        if any(x in value_str for x in _IN_INDICATORS_UPPER):
             frappe.logger().info(f"✅ Found IN indicator in field '{key}': {value}")
             return "IN"
     
-    # Try specific known fields with standard processing
-    field_checks = [
-        # (field_name, is_numeric, out_value, in_value)
-        ('log_type', False, 'OUT', 'IN'),
-        ('punch_state', True, 1, 0),
-        ('punch', True, 1, 0),
-        ('punchtype', True, 1, 0),
-        ('type', False, 'OUT', 'IN'),
-        ('direction', False, 'OUT', 'IN'),
-        ('status', False, 'OUT', 'IN'),
-        ('verify_type', True, 1, 0),
-    ]
-    
     frappe.logger().info("Checking standard fields...")
-    for field, is_numeric, out_val, in_val in field_checks:
+    for field, is_numeric, out_val, in_val in _LOG_TYPE_FIELD_CHECKS:
         if field not in transaction or transaction[field] is None:
             frappe.logger().debug(f"Field '{field}' not found in transaction")
             continue
@@ -132,13 +277,11 @@ def detect_log_type(transaction):
     punch_state_display = str(transaction.get('punch_state_display', '')).lower().strip()
     if punch_state_display:
         frappe.logger().info(f"Checking punch_state_display: '{punch_state_display}'")
-        out_indicators = ['out', 'check out', 'checkout', 'چیک آؤٹ']
-        in_indicators = ['in', 'check in', 'checkin', 'چیک ان']
         
-        if any(x in punch_state_display for x in out_indicators):
+        if any(x in punch_state_display for x in _OUT_INDICATORS):
             frappe.logger().info(f"✅ Using punch_state_display (OUT): {punch_state_display}")
             return "OUT"
-        elif any(x in punch_state_display for x in in_indicators):
+        elif any(x in punch_state_display for x in _IN_INDICATORS):
             frappe.logger().info(f"✅ Using punch_state_display (IN): {punch_state_display}")
             return "IN"
     
@@ -151,13 +294,11 @@ def detect_log_type(transaction):
         key_lower = key.lower()
         if 'punch' in key_lower or 'state' in key_lower or 'type' in key_lower:
             value_str = str(value).lower()
-            out_indicators = ['out', 'check out', 'checkout', 'چیک آؤٹ']
-            in_indicators = ['in', 'check in', 'checkin', 'چیک ان']
             
-            if any(x in value_str for x in out_indicators):
+            if any(x in value_str for x in _OUT_INDICATORS):
                 frappe.logger().info(f"✅ Using field '{key}' (OUT): {value}")
                 return "OUT"
-            elif any(x in value_str for x in in_indicators):
+            elif any(x in value_str for x in _IN_INDICATORS):
                 frappe.logger().info(f"✅ Using field '{key}' (IN): {value}")
                 return "IN"
             else:
@@ -174,46 +315,76 @@ def detect_log_type(transaction):
     return "IN"
 
 
+# Device addresses rarely change; resolutions are reused within a time bucket
+DNS_CACHE_TTL = 60
+
+
+def resolve_device_address(server_ip, server_port):
+    """
+    Resolve a device host to (family, sockaddr), reusing the result for up to
+    DNS_CACHE_TTL seconds so repeated status polls skip the DNS round trip
+    """
+    return _resolve_device_address(server_ip, int(server_port), int(time.monotonic() // DNS_CACHE_TTL))
+
+
+# Bounded, as check_device_status is whitelisted and takes caller-supplied hosts
+@functools.lru_cache(maxsize=32)
+def _resolve_device_address(server_ip, server_port, ttl_bucket):
+    family, _type, _proto, _canonname, sockaddr = socket.getaddrinfo(
+        server_ip, server_port, socket.AF_INET, socket.SOCK_STREAM
+    )[0]
+    return family, sockaddr
+
+
+def probe_device(server_ip, server_port, timeout=1.0):
+    """
+    Open and immediately reset a TCP connection to the device
+
+    A LAN device answers in well under a second, so a short timeout keeps a
+    dead device from stalling the worker. SO_LINGER 0 closes with RST rather
+    than leaving the probe socket in TIME_WAIT under frequent polling.
+    Raises OSError if the device is unreachable.
+    """
+    family, sockaddr = resolve_device_address(server_ip, server_port)
+    with socket.socket(family, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        s.connect(sockaddr)
+
+
 @frappe.whitelist()
 def check_device_status(server_ip=None, server_port=None):
     """
     Simple socket connection check to device
     Returns device status without needing token
     """
-    server_ip = server_ip or frappe.db.get_single_value("ZKTeco Config", "server_ip")
-    server_port = server_port or frappe.db.get_single_value("ZKTeco Config", "server_port")
+    args = _defaults_if_missing(server_ip=server_ip, server_port=server_port)
+    server_ip, server_port = args.server_ip, args.server_port
     
     if not server_ip or not server_port:
         return {"connected": False, "error": "Server IP or Port not configured"}
     
     try:
-        import socket
-        import time
-        
-        start_time = time.time()
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.settimeout(5)
-        
-        result = s.connect_ex((server_ip, int(server_port)))
-        response_time = (time.time() - start_time) * 1000  # Convert to ms
-        s.close()
-        
-        if result == 0:
-            return {
-                "connected": True,
-                "ip": server_ip,
-                "port": server_port,
-                "response_time": round(response_time, 2),
-                "message": "Device is online"
-            }
-        else:
-            return {
-                "connected": False,
-                "ip": server_ip,
-                "port": server_port,
-                "error": "Connection refused or timeout"
-            }
-    
+        start_time = time.perf_counter()
+        probe_device(server_ip, server_port)
+        response_time = (time.perf_counter() - start_time) * 1000  # Convert to ms
+
+        return {
+            "connected": True,
+            "ip": server_ip,
+            "port": server_port,
+            "response_time": round(response_time, 2),
+            "message": "Device is online"
+        }
+
+    except (ConnectionError, socket.timeout):
+        return {
+            "connected": False,
+            "ip": server_ip,
+            "port": server_port,
+            "error": "Connection refused or timeout"
+        }
     except Exception as e:
         return {
             "connected": False,
@@ -229,16 +400,23 @@ def register_api_token(server_ip: str | None = None, server_port: str | int | No
     Calls the remote API to obtain a token and returns it to the client.
     """
     # Prefer values provided by the form; fallback to saved Single DocType values
-    server_ip = server_ip or frappe.db.get_single_value("ZKTeco Config", "server_ip")
-    server_port = server_port or frappe.db.get_single_value("ZKTeco Config", "server_port")
-    username = username or frappe.db.get_single_value("ZKTeco Config", "username")
-    password = password or frappe.db.get_single_value("ZKTeco Config", "password")
+    args = _defaults_if_missing(server_ip=server_ip, server_port=server_port, username=username, password=password)
+    server_ip, server_port = args.server_ip, args.server_port
+    username, password = args.username, args.password
 
     if str(server_port).strip() == "4370":
         return {"success": True, "device_mode": True, "message": _("Token not required for device on port 4370.")}
     if not all([server_ip, server_port, username, password]):
         frappe.throw(_("Please configure server IP, port, username, and password in ZKTeco Config."))
 
+    # Tokens stay valid for hours, so reuse a recently issued one, but only
+    # for a caller presenting the same password that obtained it
+    cache_key = get_token_cache_key(server_ip, server_port, username)
+    credential_hash = get_token_credential_hash(server_ip, server_port, username, password)
+    cached = frappe.cache().get_value(cache_key)
+    if cached and hmac.compare_digest(cached.get("credential_hash", ""), credential_hash):
+        return cached["result"]
+
     # Build URL with proper protocol
     url = build_api_url(server_ip, server_port, "/api-token-auth/")
 
@@ -248,7 +426,7 @@ def register_api_token(server_ip: str | None = None, server_port: str | int | No
     }
 
     try:
-        resp = requests.post(url, json=payload, timeout=15)
+        resp = _DESK_SESSION.post(url, json=payload, timeout=INTERACTIVE_TIMEOUT)
         resp.raise_for_status()
 
         data = resp.json()
@@ -256,7 +434,9 @@ def register_api_token(server_ip: str | None = None, server_port: str | int | No
         if not token:
             frappe.throw(_("Token not found in API response."))
 
-        return {"success": True, "token": token}
+        result = {"success": True, "token": token}
+        frappe.cache().set_value(cache_key, {"credential_hash": credential_hash, "result": result}, expires_in_sec=3000)
+        return result
 
     except requests.exceptions.RequestException as e:
         frappe.throw(_("Connection error: {0}").format(str(e)))
@@ -268,17 +448,14 @@ def test_connection():
     Enhanced test connection that shows latest transactions with detailed info
     """
     # Get token from the singleton config
-    cfg = frappe.get_single("ZKTeco Config")
+    cfg = get_cached_config()
     token = (cfg.token or "").strip()
-    server_ip = frappe.db.get_single_value("ZKTeco Config", "server_ip")
-    server_port = frappe.db.get_single_value("ZKTeco Config", "server_port")
+    server_ip = cfg.server_ip
+    server_port = cfg.server_port
     
     if str(server_port).strip() == "4370":
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(5)
-            s.connect((server_ip, int(server_port)))
-            s.close()
+            probe_device(server_ip, server_port)
             return {
                 "ok": True,
                 "status_code": 200,
@@ -307,11 +484,11 @@ def test_connection():
     }
 
     try:
-        resp = requests.get(base_url, headers=headers, params=params, timeout=15)
+        resp = _DESK_SESSION.get(base_url, headers=headers, params=params, timeout=INTERACTIVE_TIMEOUT)
         
         if resp.ok:
             try:
-                data = resp.json()
+                data = _loads(resp.content)
                 
                 # Process and format transaction data for display
                 formatted_transactions = []
@@ -330,8 +507,26 @@ def test_connection():
                 else:
                     transactions = []
                 
+                # Look up ERPNext employees for the preview in one query,
+                # preferring a match on employee over user_id
+                preview = transactions[:5]
+                codes = tuple({str(t.get('emp_code')).strip() for t in preview if t.get('emp_code')})
+                emp_lookup = {}
+                if codes:
+                    rows = frappe.db.sql("""
+                        SELECT name, employee_name, employee, user_id
+                        FROM `tabEmployee`
+                        WHERE employee IN %(c)s OR user_id IN %(c)s
+                    """, {"c": codes}, as_dict=True)
+                    code_keys = {employee_code_key(code) for code in codes}
+                    for field in ("user_id", "employee"):
+                        for r in rows:
+                            if r.get(field) and employee_code_key(r.get(field)) in code_keys:
+                                emp_lookup[employee_code_key(r.get(field))] = (r.name, r.employee_name)
+
                 # Format latest 5 transactions for preview
-                for transaction in transactions[:5]:
+                preview_errors = []
+                for transaction in preview:
                     try:
                         # Map ZKTeco transaction fields based on actual API response
                         emp_code = transaction.get('emp_code')
@@ -349,18 +544,10 @@ def test_connection():
                         # Try to find employee name from ERPNext
                         employee_name = zkteco_name
                         erpnext_employee = None
-                        if emp_code:
-                            # Try to find employee by employee_id or user_id
-                            employee = frappe.db.get_value("Employee", 
-                                                         {"employee": emp_code}, 
-                                                         ["name", "employee_name"])
-                            if not employee:
-                                employee = frappe.db.get_value("Employee", 
-                                                             {"user_id": emp_code}, 
-                                                             ["name", "employee_name"])
-                            if employee:
-                                erpnext_employee = employee[0] if isinstance(employee, tuple) else employee
-                                employee_name = f"{employee[1]} (ERPNext)" if isinstance(employee, tuple) else f"{employee} (ERPNext)"
+                        employee = emp_lookup.get(employee_code_key(emp_code)) if emp_code else None
+                        if employee:
+                            erpnext_employee = employee[0]
+                            employee_name = f"{employee[1]} (ERPNext)"
                         
                         # Determine log type based on punch_state
                         log_type = detect_log_type(transaction)
@@ -380,8 +567,9 @@ def test_connection():
                             "raw_data": transaction
                         })
                     except Exception as e:
-                        frappe.log_error(f"Error processing transaction: {e}", "ZKTeco Transaction Processing")
+                        preview_errors.append(("ZKTeco Transaction Processing", f"Error processing transaction: {e}"))
                         continue
+                log_collected_errors(preview_errors, "ZKTeco Transaction Processing")
                 
                 return {
                     "ok": True,
@@ -401,6 +589,8 @@ def test_connection():
                     "raw_response": resp.text[:500]
                 }
         else:
+            if resp.status_code in (401, 403):
+                clear_cached_token(server_ip, server_port, cfg.username)
             return {
                 "ok": False,
                 "status_code": resp.status_code,
@@ -419,18 +609,16 @@ def sync_zkteco_transactions():
     """
     Main function to sync ZKTeco transactions with ERPNext Employee Checkin records
     """
-    # Implement lock mechanism to prevent concurrent execution
-    lock_key = "zkteco_sync_lock"
-    if frappe.cache().get_value(lock_key):
+    cfg = get_cached_config()
+
+    # Per-device lock (5 minute timeout) to prevent concurrent execution
+    lock_key = f"zkteco_sync_lock:{cfg.server_ip}:{cfg.server_port}"
+    if not acquire_lock(lock_key, timeout=300):
         frappe.logger().info("ZKTeco sync already running, skipping this execution")
         return
 
     try:
-        # Acquire lock with 5 minute timeout
-        frappe.cache().set_value(lock_key, "locked", expires_in_sec=300)
-
         # Check if sync is enabled
-        cfg = frappe.get_single("ZKTeco Config")
         if str(cfg.server_port).strip() == "4370":
             frappe.logger().info("ZKTeco Sync skipped: Device mode (port 4370) does not support API-based sync.")
             return
@@ -443,7 +631,7 @@ def sync_zkteco_transactions():
             frappe.log_error("ZKTeco token not configured", "ZKTeco Sync")
             return
         # Get transactions from last sync or last hour (timezone-aware)
-        last_sync = frappe.db.get_single_value("ZKTeco Config", "last_sync")
+        last_sync = cfg.last_sync
         if last_sync:
             last_sync = get_datetime(last_sync)
         else:
@@ -451,29 +639,45 @@ def sync_zkteco_transactions():
 
         current_time = now_datetime()
 
-        transactions = fetch_zkteco_transactions(cfg, last_sync, current_time)
-
+        # adjust_checkin_sequence needs each employee's full day of punches,
+        # so the streamed pages are collected (and deduplicated) before sequencing
+        transactions = dedupe_transactions(iter_zkteco_transactions(cfg, last_sync, current_time))
         transactions = adjust_checkin_sequence(transactions)
 
         processed_count = 0
         error_count = 0
+        errors = []
 
         if transactions:
+            # Resolve all employee codes up front instead of per transaction
+            emp_map = get_employee_map(get_transaction_emp_code(t) for t in transactions)
+
+            bounds = get_checkin_time_bounds(current_time)
+
+            prepared_checkins = []
             for transaction in transactions:
                 try:
-                    if create_employee_checkin(transaction):
-                        processed_count += 1
+                    prepared = prepare_employee_checkin(transaction, emp_map, errors, bounds)
+                    if prepared:
+                        prepared_checkins.append(prepared)
                     else:
                         error_count += 1
                 except Exception as e:
                     error_count += 1
-                    frappe.log_error(f"Error creating checkin for transaction {transaction}: {str(e)}", "ZKTeco Sync Error")
+                    errors.append(("ZKTeco Sync Error", f"Error creating checkin for transaction {transaction.get('id')}: {str(e)}"))
+
+            processed_count, failed_count = insert_employee_checkins(prepared_checkins, errors)
+            error_count += failed_count
 
         # Always update last sync time, even if no transactions found
         total_synced = frappe.db.get_single_value("ZKTeco Config", "total_synced_records") or 0
         frappe.db.set_single_value("ZKTeco Config", "last_sync", current_time)
         frappe.db.set_single_value("ZKTeco Config", "total_synced_records", total_synced + processed_count)
         frappe.db.commit()
+        clear_cached_config()
+
+        # One Error Log for the whole run instead of one per failed transaction
+        log_collected_errors(errors)
 
         if transactions:
             frappe.logger().info(f"ZKTeco Sync completed: {processed_count} processed, {error_count} errors")
@@ -481,15 +685,61 @@ def sync_zkteco_transactions():
             frappe.logger().info("ZKTeco Sync completed: No new transactions found")
 
     except Exception as e:
+        frappe.db.rollback()
         frappe.log_error(f"ZKTeco sync failed: {str(e)}", "ZKTeco Sync Fatal Error")
     finally:
         # Always release lock when done
-        frappe.cache().delete_value(lock_key)
+        release_lock(lock_key)
 
 
-def fetch_zkteco_transactions(cfg, start_time, end_time):
+def parse_transactions_page(data):
+    """
+    Extract transactions and the next page URL from a ZKTeco API response
     """
-    Fetch transactions from ZKTeco device with pagination support
+    transactions = []
+    next_url = None
+
+    if isinstance(data, dict):
+        # Check for pagination
+        next_url = data.get('next')
+
+        # Extract transactions
+        if 'data' in data:
+            transactions = data['data']
+        elif 'results' in data:
+            transactions = data['results']
+        elif 'transactions' in data:
+            transactions = data['transactions']
+    elif isinstance(data, list):
+        transactions = data
+
+    return transactions or [], next_url
+
+
+def set_page_param(url, page):
+    """
+    Return url with its ``page`` query parameter replaced, keeping every
+    other parameter the server put in its ``next`` link
+    """
+    parts = urlsplit(url)
+    query = [(key, str(page) if key == "page" else value) for key, value in parse_qsl(parts.query, keep_blank_values=True)]
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+def iter_zkteco_transactions(cfg, start_time, end_time):
+    """
+    Yield transactions from ZKTeco device page by page
+
+    When the first page reports a total ``count`` and its ``next`` link uses
+    page-number pagination (a ``page`` query parameter), the remaining pages
+    are requested concurrently from that link; otherwise, e.g. for
+    limit/offset pagination, the ``next`` links are followed in order.
+    Each page's response is released once its transactions are yielded.
+
+    Pages are decoded whole rather than stream-parsed: the pagination fields
+    (``count``, ``next``) sit beside ``data`` in the same object, pages are
+    bounded by the server's page size, and the sync has to hold the full
+    window anyway for adjust_checkin_sequence.
     """
     server_ip = cfg.server_ip
     server_port = cfg.server_port
@@ -507,66 +757,81 @@ def fetch_zkteco_transactions(cfg, start_time, end_time):
         "end_time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
     }
 
-    all_transactions = []
+    total_count = 0
     current_url = base_url
     max_pages = 100  # Prevent infinite loops
 
     try:
         for page_num in range(max_pages):
             # First page uses params, subsequent pages use full URL from 'next'
-            if page_num == 0:
-                resp = requests.get(current_url, headers=headers, params=params, timeout=30)
-            else:
-                resp = requests.get(current_url, headers=headers, timeout=30)
+            resp = _SESSION.get(current_url, headers=headers, params=params if page_num == 0 else None, timeout=SYNC_TIMEOUT)
 
+            if resp.status_code in (401, 403):
+                clear_cached_token(server_ip, server_port, cfg.username)
             resp.raise_for_status()
-            data = resp.json()
+            data = _loads(resp.content)
 
             # Extract transactions from response
-            transactions = []
-            next_url = None
+            transactions, next_url = parse_transactions_page(data)
 
-            if isinstance(data, dict):
-                # Check for pagination
-                next_url = data.get('next')
-
-                # Extract transactions
-                if 'data' in data:
-                    transactions = data['data']
-                elif 'results' in data:
-                    transactions = data['results']
-                elif 'transactions' in data:
-                    transactions = data['transactions']
-            elif isinstance(data, list):
-                transactions = data
-
-            # Add transactions to the list
-            if transactions:
-                all_transactions.extend(transactions)
+            total_count += len(transactions)
+            yield from transactions
 
             # Check if there are more pages
             if not next_url:
                 break
 
+            # Total count known after the first page and pages addressed by
+            # number: fetch the rest in parallel from the server's own link
+            next_query = dict(parse_qsl(urlsplit(next_url).query))
+            if page_num == 0 and transactions and cint(data.get('count')) and 'page' in next_query:
+                # A page followed by a next link is full, so it gives the page size
+                page_size = cint(next_query.get('page_size')) or len(transactions)
+                total_pages = min(math.ceil(cint(data['count']) / page_size), max_pages)
+
+                def fetch_page(page):
+                    page_resp = _SESSION.get(set_page_param(next_url, page), headers=headers, timeout=SYNC_TIMEOUT)
+                    page_resp.raise_for_status()
+                    return parse_transactions_page(_loads(page_resp.content))[0]
+
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    for page_transactions in executor.map(fetch_page, range(2, total_pages + 1)):
+                        total_count += len(page_transactions)
+                        yield from page_transactions
+                page_num = total_pages - 1
+                break
+
             current_url = next_url
 
             # Log pagination progress
             if page_num > 0:
-                frappe.logger().info(f"ZKTeco pagination: Fetched page {page_num + 1}, total transactions so far: {len(all_transactions)}")
-
-        if len(all_transactions) > 0:
-            frappe.logger().info(f"ZKTeco fetch completed: {len(all_transactions)} transactions from {page_num + 1} page(s)")
+                frappe.logger().info(f"ZKTeco pagination: Fetched page {page_num + 1}, total transactions so far: {total_count}")
 
-        return all_transactions
+        if total_count > 0:
+            frappe.logger().info(f"ZKTeco fetch completed: {total_count} transactions from {page_num + 1} page(s)")
 
     except Exception as e:
+        # Keep whatever was already yielded; the caller syncs the partial window
         frappe.log_error(f"Failed to fetch ZKTeco transactions: {str(e)}", "ZKTeco API Error")
-        return all_transactions if all_transactions else []
+
+
+def dedupe_transactions(transactions):
+    """
+    Drop repeated punches (same emp_code, punch_time and id), which the API
+    returns when sync windows overlap, before they reach the database
+    """
+    seen = set()
+    unique = []
+    for t in transactions:
+        key = (t.get('emp_code'), t.get('punch_time'), t.get('id'))
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(t)
+    return unique
 
 
 def adjust_checkin_sequence(transactions):
-    from collections import defaultdict
-    
     if not transactions:
         return transactions
 
@@ -592,7 +857,7 @@ def adjust_checkin_sequence(transactions):
             continue
 
         try:
-            dt = get_datetime(raw_time)
+            dt = _parse_punch(raw_time)
             date_key = dt.strftime("%Y-%m-%d")
             grouped[(emp, date_key)].append((dt, t))
         except Exception as e:
@@ -662,26 +927,92 @@ def adjust_checkin_sequence(transactions):
 
 
 
-def create_employee_checkin(transaction):
+def _parse_punch(value):
     """
-    Create Employee Checkin record from ZKTeco transaction
+    Parse a ZKTeco punch time ("YYYY-MM-DD HH:MM:SS") without going through
+    frappe's generic get_datetime, which is kept only as the fallback
+    """
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace(" ", "T"))
+        except ValueError:
+            pass
+    return get_datetime(value)
+
+
+def get_checkin_time_bounds(current_time=None):
+    """
+    Return the (oldest, latest) punch times accepted for a checkin:
+    up to 90 days old and at most 5 minutes in the future
+    """
+    current_time = current_time or now_datetime()
+    return current_time - timedelta(days=90), current_time + timedelta(minutes=5)
+
+
+def log_or_collect_error(errors, message, title):
+    """
+    Append (title, message) to errors when collecting, otherwise write an Error Log
+    """
+    if errors is None:
+        frappe.log_error(message, title)
+    else:
+        errors.append((title, message))
+
+
+def log_collected_errors(errors, title="ZKTeco Sync Errors"):
+    """
+    Write errors collected during a run as a single Error Log. Never raises,
+    so a failing error log cannot take down the sync that produced it
+    """
+    if not errors:
+        return
+    try:
+        error_summary = Counter(error_title for error_title, _ in errors)
+        frappe.logger().info("ZKTeco Sync errors: " + ", ".join(f"{error_title}={count}" for error_title, count in error_summary.items()))
+        frappe.log_error(json.dumps(errors[:50], default=str, ensure_ascii=False, indent=1), title)
+    except Exception:
+        pass
+
+
+def get_transaction_emp_code(transaction):
+    """
+    Extract employee code from a transaction, checking multiple possible field names
+    """
+    return (
+        transaction.get('emp_code') or 
+        transaction.get('employee_code') or
+        transaction.get('employee_no') or
+        str(transaction.get('id', '')).split('_')[0]  # Fallback for IDs like 'EMP001_123'
+    )
+
+
+def prepare_employee_checkin(transaction, emp_map=None, errors=None, bounds=None):
+    """
+    Validate a ZKTeco transaction and build Employee Checkin values for it
+
+    Args:
+        transaction: Transaction dict from ZKTeco API
+        emp_map: Optional employee_code_key -> Employee name mapping from get_employee_map();
+            falls back to find_employee_by_code when not given
+        errors: Optional list to collect (title, message) errors in instead of
+            writing an Error Log per transaction
+        bounds: Optional (oldest, latest) accepted punch times from
+            get_checkin_time_bounds(), computed once per sync by the caller
+
+    Returns:
+        Tuple of (checkin_data, device_id) where device_id is the raw device used
+        for duplicate matching, or None if the transaction should be skipped
     """
     try:
-        # Log raw transaction for debugging
-        frappe.logger().info(f"Raw transaction data: {json.dumps(transaction, default=str, ensure_ascii=False)}")
-        
         # Log the incoming transaction for debugging
         frappe.logger().debug(f"Processing transaction: {json.dumps(transaction, default=str, ensure_ascii=False)}")
         
         # Extract transaction data based on ZKTeco API response structure
         try:
             # Extract employee code with multiple possible field names
-            emp_code = (
-                transaction.get('emp_code') or 
-                transaction.get('employee_code') or
-                transaction.get('employee_no') or
-                str(transaction.get('id', '')).split('_')[0]  # Fallback for IDs like 'EMP001_123'
-            )
+            emp_code = get_transaction_emp_code(transaction)
             
             # Define all possible time fields to check
             time_fields = [
@@ -726,13 +1057,17 @@ def create_employee_checkin(transaction):
                 # Handle string timestamps
                 if isinstance(value, str):
                     value = value.strip()
-                    for fmt in time_formats:
-                        try:
-                            punch_time = datetime.strptime(value, fmt)
-                            frappe.logger().debug(f"Parsed {field} as {fmt}: {punch_time}")
-                            break
-                        except ValueError:
-                            continue
+                    # Fast path for the standard ISO-like ZKTeco format
+                    try:
+                        punch_time = datetime.fromisoformat(value.replace(" ", "T"))
+                    except ValueError:
+                        for fmt in time_formats:
+                            try:
+                                punch_time = datetime.strptime(value, fmt)
+                                frappe.logger().debug(f"Parsed {field} as {fmt}: {punch_time}")
+                                break
+                            except ValueError:
+                                continue
                 # Handle numeric timestamps (UNIX timestamp in seconds or milliseconds)
                 elif isinstance(value, (int, float)):
                     try:
@@ -756,7 +1091,7 @@ def create_employee_checkin(transaction):
             
             if punch_time is None:
                 frappe.logger().warning(f"Could not parse punch time from transaction: {json.dumps(transaction, default=str)}")
-                return False
+                return None
                 
             # Log which field was used for debugging
             if used_field:
@@ -783,38 +1118,29 @@ def create_employee_checkin(transaction):
             
             if not emp_code:
                 frappe.logger().warning(f"Missing employee code in transaction: {json.dumps(transaction, default=str)}")
-                return False
+                return None
                 
-            # Validate punch time is within a reasonable range
-            now = now_datetime()
+            # Validate punch time type; its range is checked below
             if not isinstance(punch_time, datetime):
                 frappe.logger().warning(f"Invalid punch_time type: {type(punch_time)} for transaction {transaction_id}")
-                return False
-                
-            if punch_time > now + timedelta(days=1):  # Future date check (allow 1 day in future for timezone differences)
-                frappe.logger().warning(f"Future date in transaction {transaction_id}: {punch_time} (current time: {now})")
-                return False
-                
-            if (now - punch_time) > timedelta(days=90):
-                frappe.logger().warning(f"Skipping old transaction: {transaction_id} from {punch_time}")
-                return False
+                return None
                 
         except Exception as e:
-            frappe.log_error(f"Error processing transaction data: {str(e)}\nTransaction: {json.dumps(transaction, default=str)}", "ZKTeco Data Processing Error")
-            return False
+            log_or_collect_error(errors, f"Error processing transaction data: {str(e)}\nTransaction: {json.dumps(transaction, default=str)}", "ZKTeco Data Processing Error")
+            return None
         
         # Find employee
-        employee = find_employee_by_code(emp_code)
+        if emp_map is not None:
+            employee = emp_map.get(employee_code_key(emp_code))
+        else:
+            employee = find_employee_by_code(emp_code)
         if not employee:
-            frappe.log_error(f"Employee not found for code: {emp_code}", "ZKTeco Employee Mapping")
-            return False
+            log_or_collect_error(errors, f"Employee not found for code: {emp_code}", "ZKTeco Employee Mapping")
+            return None
         
         # Convert punch_time to datetime
         try:
-            if isinstance(punch_time, str):
-                punch_datetime = get_datetime(punch_time)
-            else:
-                punch_datetime = punch_time
+            punch_datetime = _parse_punch(punch_time)
                 
             # If we still don't have a valid datetime, try parsing from timestamp
             if not punch_datetime and 'timestamp' in transaction:
@@ -824,59 +1150,60 @@ def create_employee_checkin(transaction):
                     pass
                     
             if not punch_datetime:
-                frappe.log_error(f"Could not parse punch time: {punch_time}", "ZKTeco Time Parse Error")
-                return False
+                log_or_collect_error(errors, f"Could not parse punch time: {punch_time}", "ZKTeco Time Parse Error")
+                return None
                 
         except Exception as e:
-            frappe.log_error(f"Error parsing time {punch_time}: {str(e)}", "ZKTeco Time Parse Error")
-            return False
+            log_or_collect_error(errors, f"Error parsing time {punch_time}: {str(e)}", "ZKTeco Time Parse Error")
+            return None
 
-        # Validate timestamp is reasonable
-        current_time = now_datetime()
-        max_past_days = 90  # Don't sync records older than 90 days
+        # Validate timestamp is reasonable: not older than 90 days, and no more
+        # than 5 minutes in the future (buffer for clock differences)
+        oldest, latest = bounds or get_checkin_time_bounds()
 
-        # Check if timestamp is in the future (with 5-minute buffer for clock differences)
-        if punch_datetime > current_time + timedelta(minutes=5):
-            frappe.log_error(
-                f"Transaction timestamp is in the future: {punch_datetime} (current: {current_time})\nTransaction: {json.dumps(transaction, default=str, ensure_ascii=False)}",
+        # Check if timestamp is in the future
+        if punch_datetime > latest:
+            log_or_collect_error(
+                errors,
+                f"Transaction timestamp is in the future: {punch_datetime} (latest allowed: {latest})\nTransaction: {json.dumps(transaction, default=str, ensure_ascii=False)}",
                 "ZKTeco Invalid Timestamp"
             )
-            return False
+            return None
 
         # Check if timestamp is too old
-        if punch_datetime < current_time - timedelta(days=max_past_days):
+        if punch_datetime < oldest:
             frappe.logger().debug(
-                f"Skipping old transaction: {punch_datetime} (older than {max_past_days} days)"
+                f"Skipping old transaction: {punch_datetime} (older than {oldest})"
             )
-            return False
+            return None
 
         # Check if log_type was already set by adjust_checkin_sequence
         if transaction.get('_sequence_adjusted') is not None and transaction.get('log_type'):
             log_type = transaction['log_type']
-            frappe.logger().info(f"Using sequence-adjusted log type: {log_type}")
+            frappe.logger().debug(f"Using sequence-adjusted log type: {log_type}")
         else:
             # Log before detecting log type
-            frappe.logger().info("Detecting log type for transaction")
+            frappe.logger().debug("Detecting log type for transaction")
             log_type = detect_log_type(transaction)
             
             # Log the detected log type
             if log_type:
-                frappe.logger().info(f"Detected log type: {log_type}")
+                frappe.logger().debug(f"Detected log type: {log_type}")
             else:
                 log_type = "IN"  # Default to "IN" if detection fails
                 frappe.logger().warning("Could not determine log type, defaulting to IN")
                 
             # Log the final log type being used
-            frappe.logger().info(f"Final log type being used: {log_type}")
+            frappe.logger().debug(f"Final log type being used: {log_type}")
             
             # Also log transaction keys for debugging
-            frappe.logger().info(f"Transaction keys: {list(transaction.keys())}")
+            frappe.logger().debug(f"Transaction keys: {list(transaction.keys())}")
             if 'punch_state_display' in transaction:
-                frappe.logger().info(f"punch_state_display: {transaction['punch_state_display']}")
+                frappe.logger().debug(f"punch_state_display: {transaction['punch_state_display']}")
             if 'punch_state' in transaction:
-                frappe.logger().info(f"punch_state: {transaction['punch_state']}")
+                frappe.logger().debug(f"punch_state: {transaction['punch_state']}")
             if 'punch' in transaction:
-                frappe.logger().info(f"punch: {transaction['punch']}")
+                frappe.logger().debug(f"punch: {transaction['punch']}")
 
         # Build unique device_id with transaction ID to prevent duplicates
         unique_device_id = f"{device_id} (ZKTeco-{transaction_id})" if (device_id and transaction_id) else (device_id or f"ZKTeco-{transaction_id}" if transaction_id else "ZKTeco Device")
@@ -887,18 +1214,6 @@ def create_employee_checkin(transaction):
         # Create a more precise timestamp for the checkin (including seconds)
         checkin_time = punch_datetime.strftime('%Y-%m-%d %H:%M:%S')
         
-        # Check if checkin already exists - include log_type to allow both IN and OUT for same employee/time
-        existing_checkin = frappe.db.get_value("Employee Checkin", {
-            "employee": employee,
-            "time": ["=", checkin_time],
-            "log_type": log_type,
-            "device_id": ["like", f"%{device_id}%" if device_id else "%ZKTeco%"]
-        }, ['name', 'device_id', 'log_type'], as_dict=1)
-
-        if existing_checkin:
-            frappe.logger().debug(f"Skipping duplicate checkin: {employee} at {checkin_time} ({log_type}) - {existing_checkin}")
-            return True  # Already processed
-        
         # Create Employee Checkin
         checkin_data = {
             "doctype": "Employee Checkin",
@@ -914,36 +1229,136 @@ def create_employee_checkin(transaction):
             if field in transaction and transaction[field]:
                 checkin_data[f'zkteco_{field}'] = str(transaction[field])
         
+        return checkin_data, device_id
+
+    except Exception as e:
+        error_msg = f"Error preparing Employee Checkin: {str(e)}\nTransaction: {json.dumps(transaction, default=str, ensure_ascii=False)}"
+        log_or_collect_error(errors, error_msg, "ZKTeco Checkin Creation Error")
+        return None
+
+
+def create_employee_checkin(transaction, emp_map=None):
+    """
+    Create Employee Checkin record from ZKTeco transaction
+
+    Does not commit; the caller (or the request) commits once for the batch.
+    """
+    prepared = prepare_employee_checkin(transaction, emp_map)
+    if not prepared:
+        return False
+
+    checkin_data, device_id = prepared
+    employee = checkin_data["employee"]
+    checkin_time = checkin_data["time"]
+    log_type = checkin_data["log_type"]
+
+    frappe.db.savepoint("zkteco_checkin")
+    try:
+        # Check if checkin already exists - include log_type to allow both IN and OUT for same employee/time
+        existing_checkin = frappe.db.get_value("Employee Checkin", {
+            "employee": employee,
+            "time": ["=", checkin_time],
+            "log_type": log_type,
+            "device_id": ["like", f"%{device_id}%" if device_id else "%ZKTeco%"]
+        }, ['name', 'device_id', 'log_type'], as_dict=1)
+
+        if existing_checkin:
+            frappe.logger().debug(f"Skipping duplicate checkin: {employee} at {checkin_time} ({log_type}) - {existing_checkin}")
+            return True  # Already processed
+
         # Log the checkin data for debugging
         frappe.logger().debug(f"Creating checkin: {json.dumps(checkin_data, default=str)}")
         
         checkin = frappe.get_doc(checkin_data)
         checkin.insert(ignore_permissions=True, ignore_if_duplicate=True)
-        frappe.db.commit()
         
         frappe.logger().info(f"Created {log_type} checkin for employee {employee} at {checkin_time}")
         return True
         
-    except frappe.DuplicateEntryError:
+    except frappe.DuplicateEntryError as e:
         frappe.logger().debug(f"Duplicate checkin detected and skipped: {str(e)}")
-        frappe.db.rollback()
+        frappe.db.rollback(save_point="zkteco_checkin")
         return True
     except Exception as e:
+        frappe.db.rollback(save_point="zkteco_checkin")
         error_msg = f"Error creating Employee Checkin: {str(e)}\nTransaction: {json.dumps(transaction, default=str, ensure_ascii=False)}"
         frappe.log_error(error_msg, "ZKTeco Checkin Creation Error")
-        frappe.db.rollback()
-        return False
         return False
 
 
+def insert_employee_checkins(prepared_checkins, errors=None):
+    """
+    Insert prepared checkins in one transaction
+
+    Existing checkins for the batch are fetched with a single query and each
+    insert runs inside a savepoint, so one bad row does not undo the others.
+    The caller is responsible for the final commit.
+
+    Rows go through the Employee Checkin controller rather than a raw
+    multi-row INSERT: its validate sets employee_name and the shift fields
+    that auto attendance relies on.
+
+    Args:
+        prepared_checkins: List of (checkin_data, device_id) from prepare_employee_checkin
+        errors: Optional list to collect (title, message) errors in
+
+    Returns:
+        Tuple of (processed, failed) where processed includes skipped duplicates
+    """
+    if not prepared_checkins:
+        return 0, 0
+
+    employees = tuple({data["employee"] for data, _ in prepared_checkins})
+    times = [data["time"] for data, _ in prepared_checkins]
+
+    # Index existing device_ids by (employee, time, log_type) for the batch window
+    existing = {}
+    for row in frappe.db.sql("""
+        SELECT employee, time, log_type, device_id
+        FROM `tabEmployee Checkin`
+        WHERE employee IN %(employees)s AND time BETWEEN %(start)s AND %(end)s
+    """, {"employees": employees, "start": min(times), "end": max(times)}, as_dict=True):
+        key = (row.employee, _parse_punch(row.time).strftime('%Y-%m-%d %H:%M:%S'), row.log_type)
+        existing.setdefault(key, []).append((row.device_id or "").lower())
+
+    processed = 0
+    failed = 0
+    for checkin_data, device_id in prepared_checkins:
+        key = (checkin_data["employee"], checkin_data["time"], checkin_data["log_type"])
+        match = str(device_id or "ZKTeco").lower()
+        if any(match in existing_device for existing_device in existing.get(key, [])):
+            frappe.logger().debug(f"Skipping duplicate checkin: {key}")
+            processed += 1
+            continue
+
+        frappe.db.savepoint("zkteco_checkin")
+        try:
+            checkin = frappe.get_doc(checkin_data)
+            # Employees were resolved from tabEmployee, no need to re-validate the link
+            checkin.flags.ignore_links = True
+            checkin.insert(ignore_permissions=True, ignore_if_duplicate=True)
+            existing.setdefault(key, []).append(checkin_data["device_id"].lower())
+            processed += 1
+        except frappe.DuplicateEntryError:
+            frappe.db.rollback(save_point="zkteco_checkin")
+            processed += 1
+        except Exception as e:
+            frappe.db.rollback(save_point="zkteco_checkin")
+            failed += 1
+            log_or_collect_error(
+                errors,
+                f"Error creating Employee Checkin: {str(e)}\nCheckin: {json.dumps(checkin_data, default=str, ensure_ascii=False)}",
+                "ZKTeco Checkin Creation Error"
+            )
+
+    return processed, failed
+
+
 @frappe.whitelist()
 def test_transaction_parsing(transaction_json):
     """
     Test how a transaction will be parsed
     """
-    import json
-    from frappe.utils import now_datetime
-    
     try:
         if isinstance(transaction_json, str):
             transaction = json.loads(transaction_json)
@@ -965,11 +1380,7 @@ def test_transaction_parsing(transaction_json):
         formatted_time = None
         if punch_time:
             try:
-                if isinstance(punch_time, str):
-                    dt = get_datetime(punch_time)
-                else:
-                    dt = punch_time
-                formatted_time = dt.strftime('%Y-%m-%d %H:%M:%S')
+                formatted_time = _parse_punch(punch_time).strftime('%Y-%m-%d %H:%M:%S')
             except Exception:
                 formatted_time = str(punch_time)
         
@@ -1006,6 +1417,15 @@ def test_transaction_parsing(transaction_json):
         }
 
 
+@functools.lru_cache(maxsize=None)
+def _has_attendance_device_id(site):
+    """
+    Whether Employee has the attendance_device_id column, checked once per
+    site per worker since schema does not change at runtime
+    """
+    return frappe.db.has_column("Employee", "attendance_device_id")
+
+
 def find_employee_by_code(emp_code):
     """
     Find employee by various ID fields
@@ -1021,7 +1441,7 @@ def find_employee_by_code(emp_code):
         return employee
     
     # Try attendance_device_id if it exists
-    if frappe.db.has_column("Employee", "attendance_device_id"):
+    if _has_attendance_device_id(frappe.local.site):
         employee = frappe.db.get_value("Employee", {"attendance_device_id": emp_code}, "name")
         if employee:
             return employee
@@ -1029,6 +1449,53 @@ def find_employee_by_code(emp_code):
     return None
 
 
+def employee_code_key(emp_code):
+    """
+    Normalize an employee code the way the database's _ci collation compares
+    it, so codes differing only in case or surrounding spaces match
+    """
+    return str(emp_code).strip().casefold()
+
+
+def get_employee_map(emp_codes):
+    """
+    Resolve many employee codes with a single query
+
+    Matches the same fields as find_employee_by_code and keeps its priority:
+    employee, then user_id, then attendance_device_id.
+
+    Returns:
+        Dict mapping employee_code_key(code) to Employee name
+    """
+    codes = tuple({str(code).strip() for code in emp_codes if code})
+    if not codes:
+        return {}
+
+    fields = ["employee", "user_id"]
+    if _has_attendance_device_id(frappe.local.site):
+        fields.append("attendance_device_id")
+
+    conditions = " OR ".join(f"`{field}` IN %(codes)s" for field in fields)
+    rows = frappe.db.sql(
+        f"""SELECT name, {", ".join(f"`{field}`" for field in fields)}
+        FROM `tabEmployee`
+        WHERE {conditions}""",
+        {"codes": codes},
+        as_dict=True,
+    )
+
+    # Fill lowest priority field first so higher priority matches overwrite it
+    code_set = {employee_code_key(code) for code in codes}
+    emp_map = {}
+    for field in reversed(fields):
+        for row in rows:
+            value = row.get(field)
+            if value and employee_code_key(value) in code_set:
+                emp_map[employee_code_key(value)] = row.name
+
+    return emp_map
+
+
 @frappe.whitelist()
 @frappe.whitelist()
 def test_sync_with_sample_data():
@@ -1087,12 +1554,13 @@ def manual_sync():
     Manual sync trigger for testing
     """
     try:
-        cfg = frappe.get_single("ZKTeco Config")
+        cfg = get_cached_config()
         if str(cfg.server_port).strip() == "4370":
             return device_mode_sync()
         sync_zkteco_transactions()
         return {"success": True, "message": "Sync completed successfully"}
     except Exception as e:
+        frappe.db.rollback()
         frappe.log_error(f"Manual sync failed: {str(e)}", "ZKTeco Manual Sync")
         return {"success": False, "message": f"Sync failed: {str(e)}"}
 
@@ -1102,27 +1570,23 @@ def scheduled_sync():
     Scheduled sync function that respects the frequency setting
     """
     try:
-        cfg = frappe.get_single("ZKTeco Config")
+        cfg = get_cached_config()
         if not cfg.enable_sync:
             return
 
-        # For frequent syncs (less than 60 seconds), check if we should actually run
-        sync_seconds = int(cfg.seconds or 300)
-        if sync_seconds < 60:
-            last_run = frappe.cache().get_value("zkteco_last_sync_run")
-            current_time = now_datetime()
-
-            if last_run:
-                time_diff = (current_time - get_datetime(last_run)).total_seconds()
-                if time_diff < sync_seconds:
-                    return  # Not yet time for next sync
-
-            # Update last run time
-            frappe.cache().set_value("zkteco_last_sync_run", current_time)
-
-        # Check if using multiple devices
-        if cfg.use_multiple_devices and cfg.devices:
-            sync_multiple_devices(cfg)
+        # For frequent syncs (less than 60 seconds), check if we should actually run.
+        # The marker expires after sync_seconds, so one atomic SET NX EX both
+        # checks and claims the slot across scheduler workers. The older
+        # "zkteco_last_sync_run" key was written without a TTL, so it is not reused.
+        sync_seconds = cint(cfg.seconds) or 300
+        if sync_seconds < 60 and not acquire_lock("zkteco:scheduled_sync_gate", timeout=sync_seconds):
+            return  # Not yet time for next sync
+
+        # Check if using multiple devices; only then is the full document
+        # (with its devices child table) needed
+        devices_cfg = frappe.get_single("ZKTeco Config") if cfg.use_multiple_devices else None
+        if devices_cfg and devices_cfg.devices:
+            sync_multiple_devices(devices_cfg)
         elif str(cfg.server_port).strip() == "4370":
             device_mode_sync()
         else:
@@ -1137,7 +1601,7 @@ def cleanup_scheduler_check():
     Cleanup function to ensure scheduler is working properly
     """
     try:
-        cfg = frappe.get_single("ZKTeco Config")
+        cfg = get_cached_config()
         if cfg.enable_sync:
             # Log that the scheduler is active
             frappe.logger().info("ZKTeco scheduler check: Active")
@@ -1151,34 +1615,24 @@ def get_sync_status():
     Get current sync status and statistics
     """
     try:
-        cfg = frappe.get_single("ZKTeco Config")
+        cfg = get_cached_config()
+        cutoff = frappe.utils.add_days(today(), -1)
         
-        # Get last sync time
-        last_sync = frappe.db.get_single_value("ZKTeco Config", "last_sync")
-        
-        # Count recent employee checkins from ZKTeco
-        recent_checkins = frappe.db.count("Employee Checkin", {
-            "device_id": ["like", "%ZKTeco%"],
-            "creation": [">=", frappe.utils.add_days(today(), -1)]
-        })
-        
-        # Count IN and OUT separately
-        checkins_in = frappe.db.count("Employee Checkin", {
-            "device_id": ["like", "%ZKTeco%"],
-            "log_type": "IN",
-            "creation": [">=", frappe.utils.add_days(today(), -1)]
-        })
-        
-        checkins_out = frappe.db.count("Employee Checkin", {
-            "device_id": ["like", "%ZKTeco%"],
-            "log_type": "OUT",
-            "creation": [">=", frappe.utils.add_days(today(), -1)]
-        })
+        # Count recent employee checkins from ZKTeco, split by IN/OUT, in one scan
+        counts = dict(frappe.db.sql("""
+            SELECT log_type, COUNT(*)
+            FROM `tabEmployee Checkin`
+            WHERE device_id LIKE %s AND creation >= %s
+            GROUP BY log_type
+        """, (ZKTECO_DEVICE_ID_PATTERN, cutoff)))
+        recent_checkins = sum(counts.values())
+        checkins_in = counts.get("IN", 0)
+        checkins_out = counts.get("OUT", 0)
         
         return {
             "enabled": cfg.enable_sync,
             "sync_frequency": cfg.seconds,
-            "last_sync": last_sync,
+            "last_sync": cfg.last_sync,
             "recent_checkins_24h": recent_checkins,
             "checkins_in_24h": checkins_in,
             "checkins_out_24h": checkins_out,
@@ -1200,6 +1654,7 @@ def set_config(server_ip: str, server_port: str | int, enable_sync: int = 1, sec
         cfg.seconds = str(seconds)
     cfg.save(ignore_permissions=True)
     frappe.db.commit()
+    clear_cached_config()
     return {
         "ok": True,
         "server_ip": cfg.server_ip,
@@ -1209,18 +1664,27 @@ def set_config(server_ip: str, server_port: str | int, enable_sync: int = 1, sec
     }
 
 
+def read_device_attendance(ip, port):
+    """
+    Read attendance records from a device, disconnecting even if the read fails
+    """
+    conn = ZK(ip, port=port, timeout=10, ommit_ping=True).connect()
+    try:
+        return conn.get_attendance()
+    finally:
+        conn.disconnect()
+
+
 @frappe.whitelist()
 def device_mode_sync():
-    # Implement lock mechanism to prevent concurrent execution
-    lock_key = "zkteco_device_sync_lock"
-    if frappe.cache().get_value(lock_key):
+    cfg = get_cached_config()
+
+    # Per-device lock (5 minute timeout) to prevent concurrent execution
+    lock_key = f"zkteco_device_sync_lock:{cfg.server_ip}:{cfg.server_port}"
+    if not acquire_lock(lock_key, timeout=300):
         return {"success": False, "message": "Device sync already running"}
 
     try:
-        # Acquire lock with 5 minute timeout
-        frappe.cache().set_value(lock_key, "locked", expires_in_sec=300)
-
-        cfg = frappe.get_single("ZKTeco Config")
         ip = cfg.server_ip
         port = int(str(cfg.server_port or "4370").strip())
         if port != 4370:
@@ -1228,9 +1692,7 @@ def device_mode_sync():
         if not ZK:
             return {"success": False, "message": "Device library not available"}
 
-        zk = ZK(ip, port=port, timeout=10, ommit_ping=True)
-        conn = zk.connect()
-        records = conn.get_attendance()
+        records = read_device_attendance(ip, port)
 
         # Convert attendance records to transaction format
         transactions = []
@@ -1248,22 +1710,18 @@ def device_mode_sync():
                     "_device_mode": True
                 })
 
-        conn.disconnect()
-
         # Apply sequence adjustment to ensure proper IN/OUT alternation
         frappe.logger().info(f"Device mode: Got {len(transactions)} transactions, applying sequence adjustment")
         transactions = adjust_checkin_sequence(transactions)
 
         # Create checkins with adjusted log types
-        created = 0
-        for transaction in transactions:
-            if create_checkin_from_attendance_v2(transaction, f"{ip}:{port}"):
-                created += 1
+        created = create_device_checkins(transactions, f"{ip}:{port}")
 
         frappe.db.set_single_value("ZKTeco Config", "last_sync", now_datetime())
         total_synced = frappe.db.get_single_value("ZKTeco Config", "total_synced_records") or 0
         frappe.db.set_single_value("ZKTeco Config", "total_synced_records", total_synced + created)
         frappe.db.commit()
+        clear_cached_config()
 
         frappe.logger().info(f"Device mode sync completed: {created} records created")
         return {"success": True, "created": created}
@@ -1272,130 +1730,66 @@ def device_mode_sync():
         return {"success": False, "message": str(e)}
     finally:
         # Always release lock when done
-        frappe.cache().delete_value(lock_key)
+        release_lock(lock_key)
 
 
-def create_checkin_from_attendance(att, device_id):
-    try:
-        emp_code = str(getattr(att, "user_id", "") or "").strip()
-        if not emp_code:
-            return False
-        employee = find_employee_by_code(emp_code)
-        if not employee:
-            return False
-        punch_datetime = getattr(att, "timestamp", None)
-        if not punch_datetime:
-            return False
-
-        # Validate timestamp is reasonable
-        current_time = now_datetime()
-        max_past_days = 90
-
-        # Check if timestamp is in the future
-        if punch_datetime > current_time + timedelta(minutes=5):
-            return False
-
-        # Check if timestamp is too old
-        if punch_datetime < current_time - timedelta(days=max_past_days):
-            return False
-
-        log_type = "IN"
-        try:
-            punch_val = int(getattr(att, "punch", 0))
-            log_type = "OUT" if punch_val == 1 else "IN"
-        except Exception:
-            log_type = "IN"
-        # Fixed: Include log_type in duplicate check to allow both IN and OUT
-        existing = frappe.db.exists("Employee Checkin", {
-            "employee": employee,
-            "time": punch_datetime,
-            "device_id": device_id,
-            "log_type": log_type
-        })
-        if existing:
-            return True
-        checkin = frappe.get_doc({
-            "doctype": "Employee Checkin",
-            "employee": employee,
-            "time": punch_datetime,
-            "log_type": log_type,
-            "device_id": device_id,
-            "skip_auto_attendance": 0
-        })
-        checkin.insert(ignore_permissions=True)
-        frappe.db.commit()
-        return True
-    except Exception:
-        return False
-
-
-def create_checkin_from_attendance_v2(transaction, device_id):
-    """
-    Create checkin from transaction dict (used after sequence adjustment)
+def _att_to_row(transaction, device_id, emp_map, oldest, latest):
     """
-    try:
-        emp_code = transaction.get("emp_code")
-        if not emp_code:
-            return False
-
-        employee = find_employee_by_code(emp_code)
-        if not employee:
-            frappe.logger().debug(f"Employee not found for code: {emp_code}")
-            return False
-
-        punch_datetime = transaction.get("punch_time") or transaction.get("timestamp")
-        if not punch_datetime:
-            return False
-
-        # Validate timestamp is reasonable
-        current_time = now_datetime()
-        max_past_days = 90
+    Build Employee Checkin values for a sequence-adjusted device or API transaction
 
-        # Check if timestamp is in the future
-        if punch_datetime > current_time + timedelta(minutes=5):
-            return False
+    Returns:
+        Tuple of (checkin_data, device_id) for insert_employee_checkins, or None
+        if the employee is unknown or the punch is outside [oldest, latest]
+    """
+    employee = emp_map.get(employee_code_key(transaction.get("emp_code") or ""))
+    punch_datetime = transaction.get("punch_time") or transaction.get("timestamp")
+    if not employee or not punch_datetime:
+        return None
 
-        # Check if timestamp is too old
-        if punch_datetime < current_time - timedelta(days=max_past_days):
-            return False
+    punch_datetime = _parse_punch(punch_datetime).replace(tzinfo=None)
+    if not (oldest <= punch_datetime <= latest):
+        return None
 
-        # Use log_type from adjusted sequence (this is the key fix!)
-        log_type = transaction.get("log_type", "IN")
+    return {
+        "doctype": "Employee Checkin",
+        "employee": employee,
+        "time": punch_datetime.strftime('%Y-%m-%d %H:%M:%S'),
+        "log_type": transaction.get("log_type", "IN"),
+        "device_id": device_id,
+        "skip_auto_attendance": 0
+    }, device_id
 
-        # Log the action for debugging
-        frappe.logger().debug(f"Creating {log_type} checkin for {employee} at {punch_datetime}")
 
-        # Check for existing record with same time and log_type
-        existing = frappe.db.exists("Employee Checkin", {
-            "employee": employee,
-            "time": punch_datetime,
-            "device_id": device_id,
-            "log_type": log_type
-        })
+def create_device_checkins(transactions, device_id, errors=None):
+    """
+    Create checkins for device mode transactions in one batch: one employee
+    lookup, one duplicate lookup, and no per-row commit (caller commits)
 
-        if existing:
-            frappe.logger().debug(f"Duplicate found, skipping: {employee} at {punch_datetime} ({log_type})")
-            return True
+    Failures are appended to errors when given; otherwise they are written
+    as one Error Log for the batch.
 
-        # Create the checkin
-        checkin = frappe.get_doc({
-            "doctype": "Employee Checkin",
-            "employee": employee,
-            "time": punch_datetime,
-            "log_type": log_type,
-            "device_id": device_id,
-            "skip_auto_attendance": 0
-        })
-        checkin.insert(ignore_permissions=True)
-        frappe.db.commit()
+    Returns:
+        Number of transactions processed, including existing duplicates
+    """
+    batch_errors = [] if errors is None else errors
+    emp_map = get_employee_map(t.get("emp_code") for t in transactions)
+    oldest, latest = get_checkin_time_bounds()
 
-        frappe.logger().info(f"✅ Created {log_type} checkin for {employee} at {punch_datetime}")
-        return True
+    # A malformed row is skipped and reported, not allowed to fail the batch
+    rows = []
+    for transaction in transactions:
+        try:
+            row = _att_to_row(transaction, device_id, emp_map, oldest, latest)
+        except Exception as e:
+            batch_errors.append(("ZKTeco Time Parse Error", f"Error parsing time {transaction.get('punch_time')}: {str(e)}"))
+            continue
+        if row:
+            rows.append(row)
 
-    except Exception as e:
-        frappe.logger().error(f"Error creating checkin: {str(e)}")
-        frappe.db.rollback()
-        return False
+    processed, _ = insert_employee_checkins(rows, batch_errors)
+    if errors is None:
+        log_collected_errors(batch_errors)
+    return processed
 
 
 @frappe.whitelist()
@@ -1404,8 +1798,6 @@ def fix_existing_checkins():
     One-click fix for existing checkin records with wrong IN/OUT log types
     """
     try:
-        from collections import defaultdict
-
         # Get all ZKTeco checkin records
         checkins = frappe.get_all("Employee Checkin",
             filters={"device_id": ["like", "%:4370%"]},
@@ -1420,7 +1812,7 @@ def fix_existing_checkins():
         grouped = defaultdict(list)
         for checkin in checkins:
             emp = checkin.employee
-            dt = get_datetime(checkin.time)
+            dt = _parse_punch(checkin.time)
             date_key = dt.strftime("%Y-%m-%d")
             grouped[(emp, date_key)].append({
                 "name": checkin.name,
@@ -1514,44 +1906,52 @@ def sync_multiple_devices(cfg):
         total_created = 0
         total_devices = 0
         failed_devices = []
+        errors = []
 
+        enabled_devices = []
         for device in cfg.devices:
             if not device.enabled:
                 frappe.logger().info(f"Skipping disabled device: {device.device_name}")
                 continue
+            enabled_devices.append(device)
 
-            try:
-                frappe.logger().info(f"Syncing device: {device.device_name} ({device.server_ip}:{device.server_port})")
+        # Device reads are pure network I/O, so overlap them; the DB writes
+        # below stay on this thread since frappe.db is not shared across threads
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            fetches = {device.name: executor.submit(fetch_device_transactions, device) for device in enabled_devices}
 
-                # Check if device mode (port 4370) or API mode
-                port = str(device.server_port).strip()
-                if port == "4370":
-                    result = sync_single_device_mode(device)
-                else:
-                    result = sync_single_api_mode(device)
+            for device in enabled_devices:
+                try:
+                    frappe.logger().info(f"Syncing device: {device.device_name} ({device.server_ip}:{device.server_port})")
 
-                if result.get("success"):
-                    total_created += result.get("created", 0)
-                    total_devices += 1
+                    result = process_device_transactions(device, fetches[device.name].result(), errors)
 
-                    # Update device sync stats
-                    frappe.db.set_value("ZKTeco Device", device.name, {
-                        "last_sync": now_datetime(),
-                        "total_synced": (device.total_synced or 0) + result.get("created", 0)
-                    })
-                else:
-                    failed_devices.append(f"{device.device_name}: {result.get('message', 'Unknown error')}")
+                    if result.get("success"):
+                        total_created += result.get("created", 0)
+                        total_devices += 1
 
-            except Exception as e:
-                error_msg = f"Device {device.device_name} sync failed: {str(e)}"
-                frappe.logger().error(error_msg)
-                failed_devices.append(f"{device.device_name}: {str(e)}")
+                        # Update device sync stats
+                        frappe.db.set_value("ZKTeco Device", device.name, {
+                            "last_sync": now_datetime(),
+                            "total_synced": (device.total_synced or 0) + result.get("created", 0)
+                        })
+                    else:
+                        failed_devices.append(f"{device.device_name}: {result.get('message', 'Unknown error')}")
+
+                except Exception as e:
+                    error_msg = f"Device {device.device_name} sync failed: {str(e)}"
+                    frappe.logger().error(error_msg)
+                    failed_devices.append(f"{device.device_name}: {str(e)}")
 
         # Update global sync stats
         frappe.db.set_single_value("ZKTeco Config", "last_sync", now_datetime())
         current_total = frappe.db.get_single_value("ZKTeco Config", "total_synced_records") or 0
         frappe.db.set_single_value("ZKTeco Config", "total_synced_records", current_total + total_created)
         frappe.db.commit()
+        clear_cached_config()
+
+        # One Error Log across all devices instead of one per failed checkin
+        log_collected_errors(errors)
 
         summary = f"Synced {total_devices} device(s), created {total_created} records"
         if failed_devices:
@@ -1565,20 +1965,40 @@ def sync_multiple_devices(cfg):
         return {"success": False, "message": str(e)}
 
 
-def sync_single_device_mode(device):
+def fetch_device_transactions(device):
+    """
+    Fetch transactions from one device without touching the database,
+    so it can run in a worker thread. Returns a result dict on failure.
+    """
+    port = str(device.server_port).strip()
+    if port == "4370":
+        return fetch_device_mode_transactions(device)
+    return fetch_api_mode_transactions(device)
+
+
+def process_device_transactions(device, fetched, errors=None):
+    """
+    Create checkins for transactions returned by fetch_device_transactions
+    """
+    if isinstance(fetched, dict):
+        return fetched
+
+    transactions = adjust_checkin_sequence(fetched)
+    created = create_device_checkins(transactions, f"{device.server_ip}:{cint(device.server_port)}", errors)
+
+    frappe.logger().info(f"Device {device.device_name}: Created {created} records")
+    return {"success": True, "created": created}
+
+
+def fetch_device_mode_transactions(device):
     """
-    Sync single device in Device Mode (Port 4370)
+    Read attendance records from a device in Device Mode (Port 4370)
     """
     try:
         if not ZK:
             return {"success": False, "message": "Device library not available"}
 
-        ip = device.server_ip
-        port = int(device.server_port)
-
-        zk = ZK(ip, port=port, timeout=10, ommit_ping=True)
-        conn = zk.connect()
-        records = conn.get_attendance()
+        records = read_device_attendance(device.server_ip, int(device.server_port))
 
         # Convert attendance records to transaction format
         transactions = []
@@ -1596,64 +2016,32 @@ def sync_single_device_mode(device):
                     "_device_mode": True
                 })
 
-        conn.disconnect()
-
-        # Apply sequence adjustment
-        frappe.logger().info(f"Device {device.device_name}: Got {len(transactions)} transactions")
-        transactions = adjust_checkin_sequence(transactions)
-
-        # Create checkins
-        created = 0
-        device_id = f"{ip}:{port}"
-        for transaction in transactions:
-            if create_checkin_from_attendance_v2(transaction, device_id):
-                created += 1
-
-        frappe.logger().info(f"Device {device.device_name}: Created {created} records")
-        return {"success": True, "created": created}
+        return transactions
 
     except Exception as e:
         return {"success": False, "message": str(e)}
 
 
-def sync_single_api_mode(device):
+def fetch_api_mode_transactions(device):
     """
-    Sync single device in API Mode (Port 80/443)
+    Fetch transactions from a device in API Mode (Port 80/443)
     """
     try:
-        ip = device.server_ip
-        port = device.server_port
-        token = device.token
-
-        if not token:
+        if not device.token:
             return {"success": False, "message": "API token not configured"}
 
         # Fetch transactions using the API
-        base_url = f"http://{ip}:{port}"
-        headers = {"Authorization": f"Bearer {token}"}
+        base_url = f"http://{device.server_ip}:{device.server_port}"
+        headers = {"Authorization": f"Bearer {device.token}"}
 
         # Get transactions (simplified - you may need to adjust based on your API)
-        response = requests.get(f"{base_url}/iclock/api/transactions/", headers=headers, timeout=30)
+        response = _SESSION.get(f"{base_url}/iclock/api/transactions/", headers=headers, timeout=SYNC_TIMEOUT)
 
         if response.status_code != 200:
             return {"success": False, "message": f"API error: {response.status_code}"}
 
-        transactions = response.json()
-        if not transactions:
-            return {"success": True, "created": 0}
-
-        # Apply sequence adjustment
-        transactions = adjust_checkin_sequence(transactions)
-
-        # Create checkins
-        created = 0
-        device_id = f"{ip}:{port}"
-        for transaction in transactions:
-            if create_checkin_from_attendance_v2(transaction, device_id):
-                created += 1
-
-        return {"success": True, "created": created}
+        transactions, _ = parse_transactions_page(_loads(response.content))
+        return dedupe_transactions(transactions)
 
     except Exception as e:
         return {"success": False, "message": str(e)}
-